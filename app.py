@@ -1,34 +1,67 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import functools
+import hashlib
+import json
+import logging
 import os
+import tempfile
 import threading
 import time
-from dataclasses import dataclass, field
+from array import array
+from collections import deque
+from dataclasses import InitVar, dataclass, field
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Deque, Dict, List, Optional, TextIO, Tuple
+from urllib.parse import urlsplit
 
-import requests
+import httpx
+import orjson
 import yaml
-from flask import Flask, jsonify, render_template
+from flask import Flask, Response, jsonify, make_response, render_template, request
+from jinja2 import FileSystemBytecodeCache
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # libyaml bindings not available
+    from yaml import SafeLoader
+
+
+logger = logging.getLogger(__name__)
 
 CONFIG_PATH = os.environ.get("STATUS_CONFIG", "config.yaml")
 FALLBACK_CONFIG = "config.example.yaml"
 
-STATUS_ORDER = {
-    "major_outage": 4,
-    "partial_outage": 3,
-    "degraded_performance": 2,
-    "operational": 1,
-    "unknown": 0,
+# None lets Jinja pick a per-user directory under the system temp dir.
+JINJA_CACHE_DIR = os.environ.get("STATUS_JINJA_CACHE")
+
+# Status codes are ordered by severity so comparisons are plain integer ops;
+# STATUS_NAME maps them back to the names used by the API and templates.
+STATUS_UNKNOWN = 0
+STATUS_OPERATIONAL = 1
+STATUS_DEGRADED = 2
+STATUS_PARTIAL = 3
+STATUS_MAJOR = 4
+STATUS_NAME = (
+    "unknown",
+    "operational",
+    "degraded_performance",
+    "partial_outage",
+    "major_outage",
+)
+
+STATUS_LABELS = {
+    "operational": "All Systems Operational",
+    "degraded_performance": "Degraded Performance",
+    "partial_outage": "Partial Outage",
+    "major_outage": "Major Outage",
+    "unknown": "Status Unknown",
 }
 
 
-def serialize_dt(value: Optional[datetime]) -> Optional[str]:
-    return value.isoformat() if value else None
-
-
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ServiceConfig:
     name: str
     url: str
@@ -39,28 +72,43 @@ class ServiceConfig:
     headers: Dict[str, str] = field(default_factory=dict)
     verify_ssl: Any = True
     reachable_only: bool = False
+    # Global timeout to fall back on when timeout_seconds isn't set.
+    default_timeout: InitVar[int] = 5
+    # Resolved once at construction so probes don't rebuild them every poll.
+    request_headers: Dict[str, str] = field(init=False)
+    request_timeout: int = field(init=False)
+
+    def __post_init__(self, default_timeout: int) -> None:
+        # YAML happily yields ints/bools for unquoted header values; httpx only
+        # accepts strings.
+        headers = {"Accept": "application/json"}
+        headers.update((str(key), str(value)) for key, value in self.headers.items())
+        object.__setattr__(self, "request_headers", headers)
+        object.__setattr__(self, "request_timeout", self.timeout_seconds or default_timeout)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ServiceState:
     name: str
     component: str
-    status: str
+    status: int
     url: str
     response_ms: Optional[int]
     message: str
     checked_at: datetime
+    checked_at_iso: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Incident:
     service: str
-    status: str
+    status: int
     summary: str
     started_at: datetime
+    started_at_iso: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class StatusConfig:
     poll_interval_seconds: int = 60
     timeout_seconds: int = 5
@@ -69,16 +117,63 @@ class StatusConfig:
     services: List[ServiceConfig] = field(default_factory=list)
 
 
+def _read_config_data(source: TextIO) -> Dict[str, Any]:
+    """Parse the YAML config, reusing a JSON cache while the source is unchanged."""
+    stat = os.fstat(source.fileno())
+    src_key = [stat.st_mtime_ns, stat.st_size]
+    cache_path = source.name + ".cache.json"
+
+    try:
+        with open(cache_path, "r", encoding="utf-8") as handle:
+            cached = json.load(handle)
+        if cached.get("_source") == src_key:
+            return cached["data"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+
+    data = yaml.load(source, Loader=SafeLoader) or {}
+
+    # The cache is only an optimisation; a read-only dir or non-JSON value is fine.
+    try:
+        payload = json.dumps({"_source": src_key, "data": data})
+    except (TypeError, ValueError):
+        return data
+
+    # Write to a temp file and rename it into place so no reader ever sees a
+    # partially written cache.
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(cache_path) or ".",
+            prefix=os.path.basename(cache_path),
+            suffix=".tmp",
+        )
+    except OSError:
+        return data
+    try:
+        with open(fd, "w", encoding="utf-8") as handle:
+            handle.write(payload)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+    return data
+
+
 def load_config() -> StatusConfig:
     """Load YAML config, falling back to the example if needed."""
-    config_path = CONFIG_PATH if os.path.exists(CONFIG_PATH) else FALLBACK_CONFIG
-    if not os.path.exists(config_path):
-        raise FileNotFoundError(
-            f"Config file not found at {CONFIG_PATH}. Provide one or copy {FALLBACK_CONFIG}."
-        )
+    try:
+        handle = open(CONFIG_PATH, "r", encoding="utf-8")
+    except FileNotFoundError:
+        try:
+            handle = open(FALLBACK_CONFIG, "r", encoding="utf-8")
+        except FileNotFoundError:
+            raise FileNotFoundError(
+                f"Config file not found at {CONFIG_PATH}. Provide one or copy {FALLBACK_CONFIG}."
+            ) from None
 
-    with open(config_path, "r", encoding="utf-8") as handle:
-        data = yaml.safe_load(handle) or {}
+    with handle:
+        data = _read_config_data(handle)
+    default_timeout = data.get("timeout_seconds", 5)
 
     services = []
     for raw in data.get("services", []):
@@ -93,12 +188,13 @@ def load_config() -> StatusConfig:
                 headers=raw.get("headers", {}),
                 verify_ssl=raw.get("verify_ssl", True),
                 reachable_only=raw.get("reachable_only", False),
+                default_timeout=default_timeout,
             )
         )
 
     return StatusConfig(
         poll_interval_seconds=data.get("poll_interval_seconds", 60),
-        timeout_seconds=data.get("timeout_seconds", 5),
+        timeout_seconds=default_timeout,
         slow_threshold_ms=data.get("slow_threshold_ms"),
         max_incidents=data.get("max_incidents", 20),
         services=services,
@@ -109,10 +205,50 @@ class HealthMonitor:
     def __init__(self, config: StatusConfig):
         self.config = config
         self.state: Dict[str, ServiceState] = {}
-        self.incidents: List[Incident] = []
+        self.incidents: Deque[Incident] = deque(maxlen=config.max_incidents)
         self.last_updated: Optional[datetime] = None
         self.lock = threading.Lock()
+        self._status_counts = array("i", [0] * len(STATUS_NAME))
+        self._overall = STATUS_NAME[STATUS_UNKNOWN]
+        self._version = 0
+        # Distinguishes this process's versions from a previous run's, so a
+        # restart can't make a stale browser ETag look current.
+        self._epoch = os.urandom(4).hex()
+        self._published: Dict[str, Any] = self._build_snapshot()
         self._thread: Optional[threading.Thread] = None
+        self._origin_groups = self._group_by_origin(config.services)
+        # Built here rather than on the poll thread so a bad verify_ssl (e.g. a
+        # missing CA bundle) fails startup loudly instead of killing the thread.
+        self._clients = self._build_clients(config.services)
+
+    @staticmethod
+    def _build_clients(services: List[ServiceConfig]) -> Dict[Any, httpx.AsyncClient]:
+        # httpx only takes `verify` per client, so keep one long-lived client per
+        # distinct verify_ssl value; connections are reused across polls.
+        pool_size = max(1, len(services))
+        limits = httpx.Limits(
+            max_connections=pool_size, max_keepalive_connections=pool_size
+        )
+        clients: Dict[Any, httpx.AsyncClient] = {}
+        for service in services:
+            if service.verify_ssl not in clients:
+                clients[service.verify_ssl] = httpx.AsyncClient(
+                    http2=True,
+                    limits=limits,
+                    verify=service.verify_ssl,
+                    follow_redirects=True,
+                )
+        return clients
+
+    @staticmethod
+    def _group_by_origin(services: List[ServiceConfig]) -> List[Tuple[bool, List[int]]]:
+        """Bucket service indexes by origin, flagging HTTPS buckets as multiplexable."""
+        groups: Dict[Tuple[str, str, Any], List[int]] = {}
+        for index, service in enumerate(services):
+            parts = urlsplit(service.url)
+            key = (parts.scheme, parts.netloc, service.verify_ssl)
+            groups.setdefault(key, []).append(index)
+        return [(key[0] == "https", group) for key, group in groups.items()]
 
     def start(self) -> None:
         if self._thread and self._thread.is_alive():
@@ -122,32 +258,94 @@ class HealthMonitor:
         self._thread.start()
 
     def _poll_loop(self) -> None:
-        # Run immediately at startup so the page isn't empty.
-        self._poll_once()
-        while True:
-            time.sleep(self.config.poll_interval_seconds)
-            self._poll_once()
-
-    def _poll_once(self) -> None:
-        for service in self.config.services:
-            result = self._check_service(service)
+        asyncio.run(self._poll_forever())
+
+    async def _poll_forever(self) -> None:
+        async with contextlib.AsyncExitStack() as stack:
+            for client in self._clients.values():
+                await stack.enter_async_context(client)
+
+            # Run immediately at startup so the page isn't empty.
+            while True:
+                try:
+                    await self._poll_once(self._clients)
+                except Exception:
+                    # Never let one bad poll stop monitoring for good.
+                    logger.exception("Health poll failed")
+                await asyncio.sleep(self.config.poll_interval_seconds)
+
+    async def _poll_once(self, clients: Dict[Any, httpx.AsyncClient]) -> None:
+        # Probe origins concurrently, but record in config order so incident
+        # ordering stays stable between polls.
+        now = datetime.now(timezone.utc)
+        now_iso = now.isoformat()
+        group_results = await asyncio.gather(
+            *[
+                self._check_group(clients, multiplex, group, now, now_iso)
+                for multiplex, group in self._origin_groups
+            ]
+        )
+        results: List[Optional[ServiceState]] = [None] * len(self.config.services)
+        for (_, group), states in zip(self._origin_groups, group_results):
+            for index, state in zip(group, states):
+                results[index] = state
+        for service, result in zip(self.config.services, results):
             self._record_result(service, result)
         with self.lock:
             self.last_updated = datetime.now(timezone.utc)
+            # Readers pick this up with a single attribute load; it is never mutated.
+            self._version += 1
+            self._published = self._build_snapshot()
+
+    async def _check_group(
+        self,
+        clients: Dict[Any, httpx.AsyncClient],
+        multiplex: bool,
+        group: List[int],
+        checked_at: datetime,
+        checked_at_iso: str,
+    ) -> List[ServiceState]:
+        services = [self.config.services[index] for index in group]
+        if multiplex:
+            # httpx holds concurrent requests to a new HTTPS origin on the pending
+            # connection, so if ALPN picks HTTP/2 they all share one socket as streams.
+            return list(
+                await asyncio.gather(
+                    *[
+                        self._check_service(
+                            clients[service.verify_ssl], service, checked_at, checked_at_iso
+                        )
+                        for service in services
+                    ]
+                )
+            )
 
-    def _check_service(self, service: ServiceConfig) -> ServiceState:
+        # Plain HTTP/1.1 can't multiplex, so run probes back to back to share a
+        # single keep-alive connection instead of each opening its own.
+        states = []
+        for service in services:
+            states.append(
+                await self._check_service(
+                    clients[service.verify_ssl], service, checked_at, checked_at_iso
+                )
+            )
+        return states
+
+    async def _check_service(
+        self,
+        client: httpx.AsyncClient,
+        service: ServiceConfig,
+        checked_at: datetime,
+        checked_at_iso: str,
+    ) -> ServiceState:
         started = time.perf_counter()
-        timeout = service.timeout_seconds or self.config.timeout_seconds
-        headers = {"Accept": "application/json"}
-        headers.update(service.headers)
 
         try:
-            response = requests.request(
+            response = await client.request(
                 service.method,
                 service.url,
-                headers=headers,
-                timeout=timeout,
-                verify=service.verify_ssl,
+                headers=service.request_headers,
+                timeout=service.request_timeout,
             )
             elapsed_ms = int((time.perf_counter() - started) * 1000)
 
@@ -160,14 +358,14 @@ class HealthMonitor:
             )
 
             if ok_status and not slow:
-                status = "operational"
+                status = STATUS_OPERATIONAL
                 message = (
                     "Reachable"
                     if service.reachable_only
                     else f"{response.status_code} OK"
                 )
             elif ok_status and slow:
-                status = "degraded_performance"
+                status = STATUS_DEGRADED
                 message = (
                     (
                         "Reachable but slow"
@@ -177,7 +375,7 @@ class HealthMonitor:
                     + f" ({elapsed_ms}ms > {self.config.slow_threshold_ms}ms)"
                 )
             else:
-                status = "partial_outage"
+                status = STATUS_PARTIAL
                 message = f"Unexpected status {response.status_code}"
 
             return ServiceState(
@@ -187,27 +385,44 @@ class HealthMonitor:
                 url=service.url,
                 response_ms=elapsed_ms,
                 message=message,
-                checked_at=datetime.now(timezone.utc),
+                checked_at=checked_at,
+                checked_at_iso=checked_at_iso,
+            )
+        except httpx.TimeoutException:
+            return ServiceState(
+                name=service.name,
+                component=service.component,
+                status=STATUS_MAJOR,
+                url=service.url,
+                response_ms=None,
+                message=f"Timeout after {service.request_timeout}s",
+                checked_at=checked_at,
+                checked_at_iso=checked_at_iso,
             )
-        except requests.Timeout:
+        except (httpx.HTTPError, httpx.InvalidURL) as exc:
             return ServiceState(
                 name=service.name,
                 component=service.component,
-                status="major_outage",
+                status=STATUS_MAJOR,
                 url=service.url,
                 response_ms=None,
-                message=f"Timeout after {timeout}s",
-                checked_at=datetime.now(timezone.utc),
+                message=str(exc) or type(exc).__name__,
+                checked_at=checked_at,
+                checked_at_iso=checked_at_iso,
             )
-        except requests.RequestException as exc:
+        except Exception as exc:
+            # Anything else (e.g. a malformed request) still counts as an outage
+            # rather than escaping and taking down the poll.
+            logger.exception("Unexpected error checking %s", service.name)
             return ServiceState(
                 name=service.name,
                 component=service.component,
-                status="major_outage",
+                status=STATUS_MAJOR,
                 url=service.url,
                 response_ms=None,
-                message=str(exc),
-                checked_at=datetime.now(timezone.utc),
+                message=f"{type(exc).__name__}: {exc}",
+                checked_at=checked_at,
+                checked_at_iso=checked_at_iso,
             )
 
     def _record_result(self, service: ServiceConfig, result: ServiceState) -> None:
@@ -215,40 +430,79 @@ class HealthMonitor:
             previous = self.state.get(service.name)
             self.state[service.name] = result
 
-            if result.status != "operational":
-                should_log = previous is None or previous.status == "operational"
+            if previous is not None:
+                self._status_counts[previous.status] -= 1
+            self._status_counts[result.status] += 1
+            self._overall = self._overall_status()
+
+            if result.status != STATUS_OPERATIONAL:
+                should_log = previous is None or previous.status == STATUS_OPERATIONAL
                 if should_log:
                     incident = Incident(
                         service=service.name,
                         status=result.status,
                         summary=result.message,
                         started_at=result.checked_at,
+                        started_at_iso=result.checked_at_iso,
                     )
-                    self.incidents.insert(0, incident)
-                    self.incidents = self.incidents[: self.config.max_incidents]
+                    self.incidents.appendleft(incident)
 
     def snapshot(self) -> Dict[str, Any]:
-        with self.lock:
-            services = list(self.state.values())
-            incidents = list(self.incidents)
-            last_updated = self.last_updated
-
-        overall_status = self._overall_status(services)
+        """Return the latest published snapshot; lock-free since it is swapped whole."""
+        return self._published
+
+    def _build_snapshot(self) -> Dict[str, Any]:
+        """Freeze the current state for readers; callers must hold ``self.lock``."""
+        # Worst status first, then by name, so readers can render in order as-is.
+        services = tuple(
+            sorted(self.state.values(), key=lambda service: (-service.status, service.name))
+        )
+        incidents = tuple(self.incidents)
+        overall = self._overall
+
+        # Serialize the API payload here, once per poll, rather than per request.
+        api_body = orjson.dumps(
+            {
+                "overall_status": overall,
+                "last_updated": self.last_updated,
+                "services": [
+                    {
+                        "name": service.name,
+                        "component": service.component,
+                        "status": STATUS_NAME[service.status],
+                        "url": service.url,
+                        "response_ms": service.response_ms,
+                        "message": service.message,
+                        "checked_at": service.checked_at_iso,
+                    }
+                    for service in services
+                ],
+                "incidents": [
+                    {
+                        "service": incident.service,
+                        "status": STATUS_NAME[incident.status],
+                        "summary": incident.summary,
+                        "started_at": incident.started_at_iso,
+                    }
+                    for incident in incidents
+                ],
+            }
+        )
         return {
             "services": services,
             "incidents": incidents,
-            "last_updated": last_updated,
-            "overall": overall_status,
+            "last_updated": self.last_updated,
+            "overall": overall,
+            "api_body": api_body,
+            "api_etag": hashlib.blake2b(api_body, digest_size=8).hexdigest(),
+            "page_etag": f"{self._epoch}-{self._version}" if self.last_updated else None,
         }
 
-    def _overall_status(self, services: List[ServiceState]) -> str:
-        if not services:
-            return "unknown"
-        return max(
-            (service.status for service in services),
-            key=lambda status: STATUS_ORDER.get(status, 0),
-            default="unknown",
-        )
+    def _overall_status(self) -> str:
+        for code in range(STATUS_MAJOR, STATUS_UNKNOWN, -1):
+            if self._status_counts[code] > 0:
+                return STATUS_NAME[code]
+        return STATUS_NAME[STATUS_UNKNOWN]
 
 
 config = load_config()
@@ -257,36 +511,65 @@ monitor.start()
 
 app = Flask(__name__)
 
+# Keep compiled template bytecode on disk so restarts and extra workers skip
+# re-parsing templates.
+if JINJA_CACHE_DIR:
+    os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(JINJA_CACHE_DIR)
+
+
+@functools.lru_cache(maxsize=512)
+def _fmt_time_cached(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%b %d, %H:%M UTC")
+
 
 @app.template_filter("fmt_time")
 def fmt_time(value: Optional[datetime]) -> str:
     if not value:
         return "–"
-    return value.astimezone(timezone.utc).strftime("%b %d, %H:%M UTC")
+    # Timestamps only change once per poll, so re-renders hit the cache.
+    return _fmt_time_cached(value)
 
 
 @app.template_filter("status_label")
 def status_label(status: str) -> str:
-    return {
-        "operational": "All Systems Operational",
-        "degraded_performance": "Degraded Performance",
-        "partial_outage": "Partial Outage",
-        "major_outage": "Major Outage",
-        "unknown": "Status Unknown",
-    }.get(status, status.title())
+    return STATUS_LABELS.get(status) or status.title()
+
+
+def _precompile_templates() -> None:
+    for name in app.jinja_env.list_templates(extensions=["html"]):
+        app.jinja_env.get_template(name)
+
+
+# Compile templates at startup (filters must be registered first) rather than on
+# the first request.
+_precompile_templates()
 
 
 @app.route("/")
-def index() -> str:
+def index() -> Any:
     snapshot = monitor.snapshot()
-    return render_template(
-        "index.html",
-        services=snapshot["services"],
-        incidents=snapshot["incidents"],
-        last_updated=snapshot["last_updated"],
-        overall=snapshot["overall"],
-        poll_interval=config.poll_interval_seconds,
+    etag = snapshot["page_etag"]
+    # Nothing on the page changes between polls, so revalidations skip rendering.
+    if etag and request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        return response
+
+    response = make_response(
+        render_template(
+            "index.html",
+            services=snapshot["services"],
+            incidents=snapshot["incidents"],
+            last_updated=snapshot["last_updated"],
+            overall=snapshot["overall"],
+            poll_interval=config.poll_interval_seconds,
+        )
     )
+    if etag:
+        response.set_etag(etag, weak=True)
+        response.last_modified = snapshot["last_updated"]
+    return response
 
 
 @app.route("/errors")
@@ -309,33 +592,9 @@ def errors() -> str:
 @app.route("/api/status")
 def api_status() -> Any:
     snapshot = monitor.snapshot()
-    return jsonify(
-        {
-            "overall_status": snapshot["overall"],
-            "last_updated": serialize_dt(snapshot["last_updated"]),
-            "services": [
-                {
-                    "name": service.name,
-                    "component": service.component,
-                    "status": service.status,
-                    "url": service.url,
-                    "response_ms": service.response_ms,
-                    "message": service.message,
-                    "checked_at": serialize_dt(service.checked_at),
-                }
-                for service in snapshot["services"]
-            ],
-            "incidents": [
-                {
-                    "service": incident.service,
-                    "status": incident.status,
-                    "summary": incident.summary,
-                    "started_at": serialize_dt(incident.started_at),
-                }
-                for incident in snapshot["incidents"]
-            ],
-        }
-    )
+    response = Response(snapshot["api_body"], mimetype="application/json")
+    response.set_etag(snapshot["api_etag"])
+    return response.make_conditional(request)
 
 
 @app.route("/healthz")
@@ -359,5 +618,7 @@ def handle_error(error: Exception):
 
 
 if __name__ == "__main__":
+    from waitress import serve
+
     port = int(os.environ.get("PORT", 9090))
-    app.run(host="0.0.0.0", port=port, debug=False)
+    serve(app, host="0.0.0.0", port=port, threads=16)